@@ -0,0 +1,99 @@
+"""
+agents/batch_extraction_agent.py - Extracts all claim documents in a single LLM call
+"""
+import logging
+from typing import List, Tuple
+
+from services.llm_service import get_llm_service
+from models.schemas import BatchExtractionResult
+from utils.text import smart_truncate
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SYSTEM_PROMPT = """You are an expert at extracting information from medical insurance claim documents.
+You will receive several documents, each starting with a header line: ### DOC <index> TYPE=<type>
+For EVERY document, in the same order, extract one object matching its TYPE.
+
+TYPE=bill:
+{
+    "type": "bill",
+    "hospital_name": "hospital name",
+    "total_amount": numeric_amount,
+    "date_of_service": "YYYY-MM-DD",
+    "patient_name": "patient name or null",
+    "bill_items": ["item1", "item2"] or null
+}
+
+TYPE=discharge_summary:
+{
+    "type": "discharge_summary",
+    "patient_name": "full patient name",
+    "diagnosis": "primary diagnosis",
+    "admission_date": "YYYY-MM-DD",
+    "discharge_date": "YYYY-MM-DD",
+    "treating_doctor": "doctor name or null",
+    "procedures": ["procedure1", "procedure2"] or null
+}
+
+TYPE=id_card:
+{
+    "type": "id_card",
+    "patient_name": "full patient name",
+    "policy_number": "policy number",
+    "member_id": "member/subscriber ID",
+    "insurance_provider": "insurance company name or null"
+}
+
+Return ONLY valid JSON (no markdown):
+{"documents": [one object per document, in order]}"""
+
+_BATCH_SCHEMA = BatchExtractionResult.model_json_schema()
+
+class BatchExtractionAgent:
+    """Agent that extracts structured data from every claim document at once"""
+
+    def __init__(self):
+        self.llm_service = get_llm_service()
+
+    async def process(self, texts_and_types: List[Tuple[str, str, str]]) -> List:
+        """
+        Extract structured data from several documents with one LLM call
+
+        Args:
+            texts_and_types: List of (classification, text, filename) tuples
+
+        Returns:
+            One extracted document per input tuple, in the same order
+
+        Raises:
+            ValueError: If the LLM response does not match the submitted documents
+        """
+        sections = [
+            f"### DOC {i} TYPE={classification}\n{smart_truncate(text)}"
+            for i, (classification, text, _) in enumerate(texts_and_types)
+        ]
+        prompt = "Extract data from these claim documents:\n\n" + "\n\n".join(sections)
+
+        response = await self.llm_service.get_structured_output(
+            prompt=prompt,
+            system_prompt=_BATCH_SYSTEM_PROMPT,
+            schema=_BATCH_SCHEMA,
+            validate=lambda r: self._parse(r, texts_and_types)
+        )
+        documents = self._parse(response, texts_and_types)
+
+        logger.info("✅ BatchExtractionAgent: Extracted %d documents in one call", len(documents))
+        return documents
+
+    def _parse(self, response: dict, texts_and_types: List[Tuple[str, str, str]]) -> List:
+        """Parse a batch response, checking it has one document of the right type per input"""
+        documents = BatchExtractionResult(**response).documents
+
+        if len(documents) != len(texts_and_types):
+            raise ValueError(
+                f"Expected {len(texts_and_types)} documents from batch extraction, got {len(documents)}"
+            )
+        for doc, (classification, _, filename) in zip(documents, texts_and_types):
+            if doc.type != classification:
+                raise ValueError(f"Batch extraction returned '{doc.type}' for {classification} '{filename}'")
+        return documents
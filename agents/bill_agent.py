@@ -2,22 +2,15 @@
 BILL_AGENT - agents/bill_agent.py
 Save this file as: superclaims-backend/agents/bill_agent.py
 """
-from services.llm_service import LLMService
+import logging
+from services.llm_service import get_llm_service
 from models.schemas import BillDocument
-from utils.helpers import setup_logging
+from utils.text import smart_truncate
+from utils.helpers import has_extractable_text
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
 
-class BillAgent:
-    """Agent specialized in extracting data from medical bills"""
-    
-    def __init__(self):
-        self.llm_service = LLMService()
-    
-    async def process(self, text: str, filename: str) -> BillDocument:
-        """Extract structured data from medical bill text"""
-        
-        system_prompt = """You are an expert at extracting information from medical bills.
+_BILL_SYSTEM_PROMPT = """You are an expert at extracting information from medical bills.
 Extract and return ONLY valid JSON (no markdown):
 {
     "type": "bill",
@@ -27,31 +20,44 @@ Extract and return ONLY valid JSON (no markdown):
     "patient_name": "patient name or null",
     "bill_items": ["item1", "item2"] or null
 }"""
+
+# Built once at import; pydantic regenerates the schema dict on every call
+_BILL_SCHEMA = BillDocument.model_json_schema()
+
+class BillAgent:
+    """Agent specialized in extracting data from medical bills"""
+    
+    def __init__(self):
+        self.llm_service = get_llm_service()
+    
+    async def process(self, text: str, filename: str) -> BillDocument:
+        """Extract structured data from medical bill text"""
+        if not has_extractable_text(text):
+            logger.warning("⚠️ BillAgent: No usable text in %s, skipping LLM extraction", filename)
+            return self._default_document()
         
         prompt = f"""Extract data from this medical bill:
 
-{text[:3000]}
-
-Return valid JSON only."""
+{smart_truncate(text)}"""
         
         try:
             response = await self.llm_service.get_structured_output(
                 prompt=prompt,
-                system_prompt=system_prompt,
-                schema=BillDocument.model_json_schema()
+                system_prompt=_BILL_SYSTEM_PROMPT,
+                schema=_BILL_SCHEMA,
+                validate=BillDocument.model_validate
             )
-            logger.info(f"✅ BillAgent: Extracted bill data from {filename}")
+            logger.info("✅ BillAgent: Extracted bill data from %s", filename)
             return BillDocument(**response)
         except Exception as e:
-            logger.error(f"❌ BillAgent error: {str(e)}")
-            return BillDocument(
-                type="bill",
-                hospital_name="Unknown Hospital",
-                total_amount=0.0,
-                date_of_service="2024-01-01"
-            )
-
-
-
-
-
+            logger.error("❌ BillAgent error: %s", e)
+            return self._default_document()
+    
+    def _default_document(self) -> BillDocument:
+        """Placeholder returned when extraction is skipped or fails"""
+        return BillDocument(
+            type="bill",
+            hospital_name="Unknown Hospital",
+            total_amount=0.0,
+            date_of_service="2024-01-01"
+        )
@@ -1,16 +1,31 @@
 """
 agents/classifier_agent.py - Document classification agent using LLM
 """
-from services.llm_service import LLMService
-from utils.helpers import setup_logging
+import asyncio
+import logging
+import re
+from cachetools import TTLCache
 
-logger = setup_logging()
+from services.llm_service import get_llm_service
+
+logger = logging.getLogger(__name__)
+
+# Filename keywords per document type, one pattern each so keywords of different types
+# can't consume each other's letters; when several types match, the earlier type wins
+CLASS_PATTERNS = (
+    ("bill", re.compile(r'bill|invoice|payment|receipt')),
+    ("discharge_summary", re.compile(r'discharge|summary|report')),
+    ("id_card", re.compile(r'id|card|policy|insurance')),
+)
 
 class ClassifierAgent:
     """Agent specialized in classifying document types"""
     
     def __init__(self):
-        self.llm_service = LLMService()
+        self.llm_service = get_llm_service()
+        # Normalized filename -> classification; per-key locks coalesce concurrent lookups
+        self._cache = TTLCache(maxsize=4096, ttl=3600)
+        self._locks: dict = {}
         self.system_prompt = """You are a document classification expert for medical insurance claims.
 Given a filename, classify it into ONE of these types:
 - bill: Medical bills, invoices, payment receipts
@@ -20,36 +35,47 @@ Given a filename, classify it into ONE of these types:
 Respond ONLY with: bill, discharge_summary, or id_card"""
     
     async def classify(self, filename: str, file_path: str = None) -> str:
-        """Classify document based on filename"""
-        filename_lower = filename.lower()
+        """Classify document based on filename, reusing cached results for repeated names"""
+        key = re.sub(r'[\s_\-]+', '_', filename.lower().strip())
+        if key in self._cache:
+            return self._cache[key]
         
-        # Fast filename-based classification
-        if any(kw in filename_lower for kw in ['bill', 'invoice', 'payment', 'receipt']):
-            logger.debug(f"✅ Classified '{filename}' as 'bill' (filename-based)")
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                # Another coroutine may have classified the same name while we waited
+                if key in self._cache:
+                    return self._cache[key]
+                classification = await self._classify_uncached(filename)
+                self._cache[key] = classification
+                return classification
+        except Exception as e:
+            logger.error("❌ Classification error: %s, defaulting to 'bill'", e)
             return "bill"
+        finally:
+            if not lock.locked():
+                self._locks.pop(key, None)
+    
+    async def _classify_uncached(self, filename: str) -> str:
+        """Classify by filename keywords, falling back to the LLM"""
+        filename_lower = filename.lower()
         
-        if any(kw in filename_lower for kw in ['discharge', 'summary', 'report']):
-            logger.debug(f"✅ Classified '{filename}' as 'discharge_summary' (filename-based)")
-            return "discharge_summary"
-        
-        if any(kw in filename_lower for kw in ['id', 'card', 'policy', 'insurance']):
-            logger.debug(f"✅ Classified '{filename}' as 'id_card' (filename-based)")
-            return "id_card"
+        # Fast filename-based classification
+        for doc_type, pattern in CLASS_PATTERNS:
+            if pattern.search(filename_lower):
+                logger.debug("✅ Classified '%s' as '%s' (filename-based)", filename, doc_type)
+                return doc_type
         
-        # Fallback to LLM
-        try:
-            prompt = f"Classify this document: {filename}"
-            classification = await self.llm_service.get_completion(
-                prompt=prompt,
-                system_prompt=self.system_prompt
-            )
-            classification = classification.strip().lower()
-            valid_types = ["bill", "discharge_summary", "id_card"]
-            if classification not in valid_types:
-                logger.warning(f"Invalid classification '{classification}', defaulting to 'bill'")
-                classification = "bill"
-            logger.debug(f"✅ Classified '{filename}' as '{classification}' (LLM-based)")
-            return classification
-        except Exception as e:
-            logger.error(f"❌ Classification error: {str(e)}, defaulting to 'bill'")
-            return "bill"
\ No newline at end of file
+        # Fallback to LLM (errors propagate so failed lookups are not cached)
+        prompt = f"Classify this document: {filename}"
+        classification = await self.llm_service.get_completion(
+            prompt=prompt,
+            system_prompt=self.system_prompt
+        )
+        classification = classification.strip().lower()
+        valid_types = ["bill", "discharge_summary", "id_card"]
+        if classification not in valid_types:
+            logger.warning("Invalid classification '%s', defaulting to 'bill'", classification)
+            classification = "bill"
+        logger.debug("✅ Classified '%s' as '%s' (LLM-based)", filename, classification)
+        return classification
\ No newline at end of file
@@ -3,25 +3,14 @@ DISCHARGE_AGENT - agents/discharge_agent.py
 Save this file as: superclaims-backend/agents/discharge_agent.py
 """
 
-from services.llm_service import LLMService
+import logging
+from services.llm_service import get_llm_service
 from models.schemas import DischargeSummaryDocument
-from utils.helpers import setup_logging
-logger = setup_logging()
+from utils.text import smart_truncate
+from utils.helpers import has_extractable_text
+logger = logging.getLogger(__name__)
 
-
-
-
-class DischargeAgent:
-    """Agent specialized in extracting data from discharge summaries"""
-    
-    def __init__(self):
-        
-        self.llm_service = LLMService()
-    
-    async def process(self, text: str, filename: str):
-        
-        
-        system_prompt = """You are an expert at extracting information from hospital discharge summaries.
+_DISCHARGE_SYSTEM_PROMPT = """You are an expert at extracting information from hospital discharge summaries.
 Extract and return ONLY valid JSON (no markdown):
 {
     "type": "discharge_summary",
@@ -32,27 +21,47 @@ Extract and return ONLY valid JSON (no markdown):
     "treating_doctor": "doctor name or null",
     "procedures": ["procedure1", "procedure2"] or null
 }"""
+
+_DISCHARGE_SCHEMA = DischargeSummaryDocument.model_json_schema()
+
+
+
+
+class DischargeAgent:
+    """Agent specialized in extracting data from discharge summaries"""
+    
+    def __init__(self):
+        
+        self.llm_service = get_llm_service()
+    
+    async def process(self, text: str, filename: str):
+        if not has_extractable_text(text):
+            logger.warning("⚠️ DischargeAgent: No usable text in %s, skipping LLM extraction", filename)
+            return self._default_document()
         
         prompt = f"""Extract data from this discharge summary:
 
-{text[:3000]}
-
-Return valid JSON only."""
+{smart_truncate(text)}"""
         
         try:
             response = await self.llm_service.get_structured_output(
                 prompt=prompt,
-                system_prompt=system_prompt,
-                schema=DischargeSummaryDocument.model_json_schema()
+                system_prompt=_DISCHARGE_SYSTEM_PROMPT,
+                schema=_DISCHARGE_SCHEMA,
+                validate=DischargeSummaryDocument.model_validate
             )
-            logger.info(f"✅ DischargeAgent: Extracted discharge data from {filename}")
+            logger.info("✅ DischargeAgent: Extracted discharge data from %s", filename)
             return DischargeSummaryDocument(**response)
         except Exception as e:
-            logger.error(f"❌ DischargeAgent error: {str(e)}")
-            return DischargeSummaryDocument(
-                type="discharge_summary",
-                patient_name="Unknown Patient",
-                diagnosis="Unknown",
-                admission_date="2024-01-01",
-                discharge_date="2024-01-02"
-            )
\ No newline at end of file
+            logger.error("❌ DischargeAgent error: %s", e)
+            return self._default_document()
+    
+    def _default_document(self) -> DischargeSummaryDocument:
+        """Placeholder returned when extraction is skipped or fails"""
+        return DischargeSummaryDocument(
+            type="discharge_summary",
+            patient_name="Unknown Patient",
+            diagnosis="Unknown",
+            admission_date="2024-01-01",
+            discharge_date="2024-01-02"
+        )
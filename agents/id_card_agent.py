@@ -2,21 +2,14 @@
 ID_CARD_AGENT - agents/id_card_agent.py
 Save this file as: superclaims-backend/agents/id_card_agent.py
 """
-from services.llm_service import LLMService
+import logging
+from services.llm_service import get_llm_service
 from models.schemas import IDCardDocument
-from utils.helpers import setup_logging
-logger = setup_logging()
-class IDCardAgent:
-    """Agent specialized in extracting data from insurance ID cards"""
-    
-    def __init__(self):
-       
-        self.llm_service = LLMService()
-    
-    async def process(self, text: str, filename: str):
-        
-        
-        system_prompt = """You are an expert at extracting information from insurance ID cards.
+from utils.text import smart_truncate
+from utils.helpers import has_extractable_text
+logger = logging.getLogger(__name__)
+
+_ID_SYSTEM_PROMPT = """You are an expert at extracting information from insurance ID cards.
 Extract and return ONLY valid JSON (no markdown):
 {
     "type": "id_card",
@@ -25,26 +18,43 @@ Extract and return ONLY valid JSON (no markdown):
     "member_id": "member/subscriber ID",
     "insurance_provider": "insurance company name or null"
 }"""
+
+_ID_SCHEMA = IDCardDocument.model_json_schema()
+
+class IDCardAgent:
+    """Agent specialized in extracting data from insurance ID cards"""
+    
+    def __init__(self):
+       
+        self.llm_service = get_llm_service()
+    
+    async def process(self, text: str, filename: str):
+        if not has_extractable_text(text):
+            logger.warning("⚠️ IDCardAgent: No usable text in %s, skipping LLM extraction", filename)
+            return self._default_document()
         
         prompt = f"""Extract data from this insurance ID card:
 
-{text[:3000]}
-
-Return valid JSON only."""
+{smart_truncate(text)}"""
         
         try:
             response = await self.llm_service.get_structured_output(
                 prompt=prompt,
-                system_prompt=system_prompt,
-                schema=IDCardDocument.model_json_schema()
+                system_prompt=_ID_SYSTEM_PROMPT,
+                schema=_ID_SCHEMA,
+                validate=IDCardDocument.model_validate
             )
-            logger.info(f"✅ IDCardAgent: Extracted ID card data from {filename}")
+            logger.info("✅ IDCardAgent: Extracted ID card data from %s", filename)
             return IDCardDocument(**response)
         except Exception as e:
-            logger.error(f"❌ IDCardAgent error: {str(e)}")
-            return IDCardDocument(
-                type="id_card",
-                patient_name="Unknown",
-                policy_number="UNKNOWN",
-                member_id="UNKNOWN"
-            )
\ No newline at end of file
+            logger.error("❌ IDCardAgent error: %s", e)
+            return self._default_document()
+    
+    def _default_document(self) -> IDCardDocument:
+        """Placeholder returned when extraction is skipped or fails"""
+        return IDCardDocument(
+            type="id_card",
+            patient_name="Unknown",
+            policy_number="UNKNOWN",
+            member_id="UNKNOWN"
+        )
@@ -3,19 +3,33 @@ agents/orchestrator.py - Main orchestrator for coordinating multiple AI agents
 Implements supervisor pattern for multi-agent workflow
 """
 import asyncio
-from typing import List, Dict
+import logging
+from collections import Counter
+from typing import List, Dict, Tuple
 import json
 
+from pydantic import TypeAdapter, ValidationError
+
 from agents.classifier_agent import ClassifierAgent
 from agents.bill_agent import BillAgent
 from agents.discharge_agent import DischargeAgent
 from agents.id_card_agent import IDCardAgent
+from agents.batch_extraction_agent import BatchExtractionAgent
 from agents.validator_agent import ValidatorAgent
 from services.pdf_service import PDFService
-from models.schemas import ClaimProcessingResponse, ValidationResult, ClaimDecision
-from utils.helpers import setup_logging
+from services.batch_service import BatchService
+from models.schemas import (
+    BatchJobResponse,
+    ClaimDocument,
+    ClaimProcessingResponse,
+    ValidationResult,
+    ClaimDecision,
+)
+from utils.helpers import has_extractable_text
+
+logger = logging.getLogger(__name__)
 
-logger = setup_logging()
+_CLAIM_DOCUMENT = TypeAdapter(ClaimDocument)
 
 class ClaimOrchestrator:
     """
@@ -23,7 +37,7 @@ class ClaimOrchestrator:
     Implements the supervisor pattern - central coordinator that:
     1. Classifies documents
     2. Extracts text from PDFs
-    3. Routes to appropriate specialist agents
+    3. Extracts structured data (one batched call, specialist agents as fallback)
     4. Validates results
     5. Makes final decision
     """
@@ -36,12 +50,18 @@ class ClaimOrchestrator:
             self.bill_agent = BillAgent()
             self.discharge_agent = DischargeAgent()
             self.id_card_agent = IDCardAgent()
+            self.batch_agent = BatchExtractionAgent()
             self.validator_agent = ValidatorAgent()
+            self.batch_service = BatchService()
             logger.info("✅ ClaimOrchestrator: All agents initialized")
         except Exception as e:
-            logger.error(f"❌ ClaimOrchestrator initialization error: {str(e)}")
+            logger.error("❌ ClaimOrchestrator initialization error: %s", e)
             raise
     
+    def close(self) -> None:
+        """Release resources held by the agents and services"""
+        self.pdf_service.close()
+    
     async def process_claim(self, file_paths: List[Dict]) -> ClaimProcessingResponse:
         """
         Main orchestration method - processes claim through all agents
@@ -52,74 +72,138 @@ class ClaimOrchestrator:
         Returns:
             ClaimProcessingResponse with documents, validation, and decision
         """
-        logger.info(f"🤖 Orchestrator: Starting claim processing for {len(file_paths)} files")
+        logger.info("🤖 Orchestrator: Starting claim processing for %d files", len(file_paths))
         
         try:
-            # Step 1: Classify documents
-            logger.info("📋 Step 1: Classifying documents...")
-            classifications = await self._classify_documents(file_paths)
-            logger.info(f"✅ Classifications: {classifications}")
-            
-            # Step 2: Extract text from all PDFs concurrently
-            logger.info("📄 Step 2: Extracting text from PDFs...")
-            extraction_tasks = [
-                self.pdf_service.extract_text(fp["path"]) 
-                for fp in file_paths
-            ]
-            extracted_texts = await asyncio.gather(*extraction_tasks)
-            logger.info(f"✅ Extracted text from {len(extracted_texts)} PDFs")
-            
-            # Step 3: Process each document with appropriate agent
-            logger.info("🔍 Step 3: Processing documents with specialist agents...")
-            documents = []
-            for i, (file_info, classification, text) in enumerate(
-                zip(file_paths, classifications, extracted_texts)
-            ):
-                logger.info(f"  Processing ({i+1}/{len(file_paths)}): {classification} - {file_info['filename']}")
-                doc_data = await self._route_to_agent(classification, text, file_info['filename'])
-                if doc_data:
-                    documents.append(doc_data)
-                    logger.info(f"  ✅ Processed: {classification}")
-            
-            logger.info(f"✅ Processed {len(documents)} documents")
+            # Steps 1-2: Classify each document and extract its text, pipelined per document
+            logger.info("📋 Steps 1-2: Classifying documents and extracting text from PDFs...")
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tasks = [tg.create_task(self._pipeline_one(fp)) for fp in file_paths]
+            except ExceptionGroup as eg:
+                raise eg.exceptions[0]
+            texts_and_types = [t.result() for t in tasks]
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("✅ Classifications: %s", [classification for classification, _, _ in texts_and_types])
             
-            # Step 4: Validate all extracted data
-            logger.info("✔️ Step 4: Validating data...")
-            validation_result = await self.validator_agent.validate(documents)
-            logger.info(f"✅ Validation complete: {len(validation_result.discrepancies)} issues found")
+            # Step 3: Extract structured data from all documents in one batched call
+            logger.info("🔍 Step 3: Extracting structured data from documents...")
+            documents = await self._extract_documents(texts_and_types)
             
-            # Step 5: Make final claim decision
-            logger.info("⚖️ Step 5: Making final decision...")
-            claim_decision = await self._make_decision(documents, validation_result)
-            logger.info(f"✅ Decision: {claim_decision.status}")
+            logger.info("✅ Processed %d documents", len(documents))
             
-            # Prepare response
-            response = ClaimProcessingResponse(
-                documents=documents,
-                validation=validation_result,
-                claim_decision=claim_decision,
-                processing_metadata={
-                    "total_files_processed": len(file_paths),
-                    "document_types_found": [d.type for d in documents],
-                    "validation_status": "passed" if not validation_result.discrepancies else "issues_found"
-                }
-            )
+            response = await self._build_response(documents, {
+                "total_files_processed": len(file_paths),
+                "skipped_due_to_empty_text": [
+                    filename for _, text, filename in texts_and_types
+                    if not has_extractable_text(text)
+                ]
+            })
             
             logger.info("🎉 Orchestrator: Claim processing completed successfully")
             return response
             
         except Exception as e:
-            logger.error(f"❌ Orchestrator error: {str(e)}", exc_info=True)
+            logger.error("❌ Orchestrator error: %s", e, exc_info=True)
             raise
     
-    async def _classify_documents(self, file_paths: List[Dict]) -> List[str]:
-        """Classify each PDF using the classifier agent"""
-        logger.debug(f"Classifying {len(file_paths)} documents...")
-        tasks = [
+    async def submit_batch(self, file_paths: List[Dict]) -> str:
+        """
+        Submit claims to the Gemini Batch API instead of processing them interactively
+        
+        Args:
+            file_paths: List of dicts with 'path', 'filename' and 'claim_id' keys
+            
+        Returns:
+            Batch job ID to poll with collect_batch
+        """
+        classifications = await asyncio.gather(*[
             self.classifier_agent.classify(fp["filename"], fp["path"])
             for fp in file_paths
-        ]
-        return await asyncio.gather(*tasks)
+        ])
+        return await self.batch_service.submit([
+            {**fp, "doc_type": classification}
+            for fp, classification in zip(file_paths, classifications)
+        ])
+    
+    async def collect_batch(self, job_id: str) -> BatchJobResponse:
+        """Poll a batch job and, once it has finished, validate and decide each claim"""
+        status, results = await self.batch_service.get_results(job_id)
+        if results is None:
+            return BatchJobResponse(job_id=job_id, status=status)
+        
+        claims: Dict[str, List] = {}
+        file_counts = Counter(info["claim_id"] for info, _ in results)
+        for info, data in results:
+            documents = claims.setdefault(info["claim_id"], [])
+            if data is None:
+                continue
+            try:
+                documents.append(_CLAIM_DOCUMENT.validate_python({**data, "type": info["doc_type"]}))
+            except ValidationError as e:
+                logger.error("❌ Invalid batch result for %s: %s", info["filename"], e)
+        
+        responses = {}
+        for claim_id, documents in claims.items():
+            responses[claim_id] = await self._build_response(documents, {
+                "total_files_processed": file_counts[claim_id],
+                "batch_job_id": job_id
+            })
+        return BatchJobResponse(job_id=job_id, status=status, claims=responses)
+    
+    async def _build_response(self, documents: List, processing_metadata: Dict) -> ClaimProcessingResponse:
+        """Validate extracted documents, decide the claim and assemble the response"""
+        # Step 4: Validate all extracted data
+        logger.info("✔️ Step 4: Validating data...")
+        validation_result = await self.validator_agent.validate(documents)
+        logger.info("✅ Validation complete: %d issues found", len(validation_result.discrepancies))
+        
+        # Step 5: Make final claim decision
+        logger.info("⚖️ Step 5: Making final decision...")
+        claim_decision = await self._make_decision(documents, validation_result)
+        logger.info("✅ Decision: %s", claim_decision.status)
+        
+        return ClaimProcessingResponse(
+            documents=documents,
+            validation=validation_result,
+            claim_decision=claim_decision,
+            processing_metadata={
+                **processing_metadata,
+                "document_types_found": [d.type for d in documents],
+                "validation_status": "passed" if not validation_result.discrepancies else "issues_found"
+            }
+        )
+    
+    async def _pipeline_one(self, fp: Dict) -> Tuple[str, str, str]:
+        """Classify one PDF and extract its text without waiting on the other documents"""
+        classification = await self.classifier_agent.classify(fp["filename"], fp["path"])
+        text = await self.pdf_service.extract_text(fp["path"])
+        return classification, text, fp["filename"]
+    
+    async def _extract_documents(self, texts_and_types: List[Tuple[str, str, str]]) -> List:
+        """Extract all documents with one batched LLM call, falling back to specialist agents"""
+        documents = []
+        pending = texts_and_types
+        
+        extractable = [item for item in texts_and_types if has_extractable_text(item[1])]
+        if extractable:
+            try:
+                documents = await self.batch_agent.process(extractable)
+                # Left: documents without usable text, which the specialist agents default without an LLM call
+                pending = [item for item in texts_and_types if not has_extractable_text(item[1])]
+            except Exception as e:
+                logger.warning("⚠️ Batch extraction failed, falling back to specialist agents: %s", e)
+        
+        # Specialist agents run concurrently; gather keeps results in input order
+        results = await asyncio.gather(*[
+            self._route_to_agent(classification, text, filename)
+            for classification, text, filename in pending
+        ])
+        for (classification, _, filename), doc_data in zip(pending, results):
+            if doc_data:
+                documents.append(doc_data)
+                logger.info("  ✅ Processed: %s - %s", classification, filename)
+        return documents
     
     async def _route_to_agent(self, doc_type: str, text: str, filename: str):
         """Route document to appropriate specialist agent based on type"""
@@ -134,10 +218,10 @@ class ClaimOrchestrator:
             try:
                 return await agent.process(text, filename)
             except Exception as e:
-                logger.error(f"❌ Error in {doc_type} agent: {str(e)}")
+                logger.error("❌ Error in %s agent: %s", doc_type, e)
                 return None
         else:
-            logger.warning(f"⚠️ Unknown document type: {doc_type}")
+            logger.warning("⚠️ Unknown document type: %s", doc_type)
             return None
     
     async def _make_decision(
@@ -152,15 +236,14 @@ class ClaimOrchestrator:
         - Missing documents → REJECTED
         - Data discrepancies → PENDING_REVIEW
         - All required docs + no issues → APPROVED
-        - Incomplete docs → REJECTED
-        """
         
-        doc_types = {doc.type for doc in documents}
-        required_types = {"bill", "discharge_summary", "id_card"}
+        Document presence comes from validation.missing_documents, which the
+        validator already computed, so documents are not scanned again here.
+        """
         
         # Check for missing documents
         if validation.missing_documents:
-            logger.warning(f"Missing documents: {validation.missing_documents}")
+            logger.warning("Missing documents: %s", validation.missing_documents)
             return ClaimDecision(
                 status="rejected",
                 reason=f"Missing required documents: {', '.join(validation.missing_documents)}",
@@ -169,26 +252,17 @@ class ClaimOrchestrator:
         
         # Check for data discrepancies
         if validation.discrepancies:
-            logger.warning(f"Data discrepancies found: {validation.discrepancies}")
+            logger.warning("Data discrepancies found: %s", validation.discrepancies)
             return ClaimDecision(
                 status="pending_review",
                 reason=f"Data discrepancies found - manual review required: {'; '.join(validation.discrepancies[:2])}",
                 confidence_score=0.6
             )
         
-        # Check if all required documents are present
-        if doc_types >= required_types:
-            logger.info("✅ All required documents present and validated")
-            return ClaimDecision(
-                status="approved",
-                reason="All required documents present and data is consistent",
-                confidence_score=0.95
-            )
-        
-        # Fallback: Incomplete
-        logger.warning("Incomplete documentation")
+        # No missing documents and no discrepancies
+        logger.info("✅ All required documents present and validated")
         return ClaimDecision(
-            status="rejected",
-            reason="Incomplete documentation",
-            confidence_score=0.8
-        )
\ No newline at end of file
+            status="approved",
+            reason="All required documents present and data is consistent",
+            confidence_score=0.95
+        )
@@ -1,26 +1,33 @@
+import logging
 from typing import List
 from models.schemas import ValidationResult
-from utils.helpers import setup_logging
-from datetime import datetime
+from datetime import date
 
-logger = setup_logging()
+logger = logging.getLogger(__name__)
+
+REQUIRED_TYPES = ("bill", "discharge_summary", "id_card")
 
 class ValidatorAgent:
     """Agent specialized in validating extracted claim data"""
     
     async def validate(self, documents: List) -> ValidationResult:
         """Validate documents for completeness and consistency"""
+        if not documents:
+            logger.warning("⚠️ No documents to validate - missing: %s", list(REQUIRED_TYPES))
+            return ValidationResult(missing_documents=list(REQUIRED_TYPES), discrepancies=[])
+        
         missing_documents = []
         discrepancies = []
         
+        # Index documents by type once (first document of each type wins, as before)
+        by_type = {doc.type: doc for doc in reversed(documents)}
+        
         # Check for required document types
-        doc_types = {doc.type for doc in documents}
-        required_types = {"bill", "discharge_summary", "id_card"}
-        missing = required_types - doc_types
+        missing = set(REQUIRED_TYPES) - by_type.keys()
         
         if missing:
             missing_documents = list(missing)
-            logger.warning(f"⚠️ Missing documents: {missing_documents}")
+            logger.warning("⚠️ Missing documents: %s", missing_documents)
         
         # Extract patient names from each document
         patient_names = []
@@ -33,33 +40,34 @@ class ValidatorAgent:
             unique_names = set(name for _, name in patient_names)
             if len(unique_names) > 1:
                 discrepancies.append(f"Patient name mismatch across documents")
-                logger.warning(f"⚠️ Name mismatch detected")
+                logger.warning("⚠️ Name mismatch detected")
         
         # Check date logic
-        discharge_doc = next((d for d in documents if d.type == "discharge_summary"), None)
+        discharge_doc = by_type.get("discharge_summary")
         if discharge_doc:
             try:
-                admission = datetime.strptime(discharge_doc.admission_date, "%Y-%m-%d")
-                discharge = datetime.strptime(discharge_doc.discharge_date, "%Y-%m-%d")
-                
+                admission = date.fromisoformat(discharge_doc.admission_date)
+                discharge = date.fromisoformat(discharge_doc.discharge_date)
+            except (TypeError, ValueError) as e:
+                discrepancies.append("Invalid date format")
+                logger.warning("⚠️ Date parsing error: %s", e)
+            else:
                 if discharge < admission:
                     discrepancies.append("Discharge date is before admission date")
                     logger.warning("⚠️ Date logic error detected")
-            except Exception as e:
-                logger.debug(f"Date parsing error: {e}")
         
         # Check bill amount validity
-        bill_doc = next((d for d in documents if d.type == "bill"), None)
+        bill_doc = by_type.get("bill")
         if bill_doc:
             try:
                 if bill_doc.total_amount <= 0:
                     discrepancies.append("Invalid bill amount (must be positive)")
                     logger.warning("⚠️ Invalid bill amount")
             except Exception as e:
-                logger.debug(f"Bill amount check error: {e}")
+                logger.debug("Bill amount check error: %s", e)
         
         # Check ID card validity
-        id_doc = next((d for d in documents if d.type == "id_card"), None)
+        id_doc = by_type.get("id_card")
         if id_doc:
             if not id_doc.policy_number or id_doc.policy_number == "UNKNOWN":
                 discrepancies.append("Missing or invalid policy number")
@@ -69,7 +77,7 @@ class ValidatorAgent:
                 discrepancies.append("Missing or invalid member ID")
                 logger.warning("⚠️ Invalid member ID")
         
-        logger.info(f"✅ ValidatorAgent: Validation complete - {len(discrepancies)} issues")
+        logger.info("✅ ValidatorAgent: Validation complete - %d issues", len(discrepancies))
         
         return ValidationResult(
             missing_documents=missing_documents,
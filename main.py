@@ -7,10 +7,14 @@ USAGE:
     
 Then visit: http://localhost:8000/docs
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
-from typing import List
+from contextlib import asynccontextmanager
+from typing import List, Optional
 import asyncio
+import uuid
+import aiofiles
+import aiofiles.tempfile
 from pathlib import Path
 import tempfile
 import os
@@ -20,8 +24,15 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
 from agents.orchestrator import ClaimOrchestrator
-from models.schemas import ClaimProcessingResponse
-from utils.helpers import validate_pdf_files, setup_logging
+from models.schemas import BatchJobResponse, ClaimProcessingResponse
+from utils.helpers import validate_pdf_files, setup_logging, MAX_FILE_SIZE
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Shut down the orchestrator's worker processes when the server stops"""
+    yield
+    if orchestrator:
+        orchestrator.close()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -29,7 +40,8 @@ app = FastAPI(
     description="AI-Driven Medical Insurance Claim Document Processor",
     version="1.0.0",
     docs_url="/docs",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # Setup logging
@@ -69,6 +81,27 @@ async def health_check():
         "api_docs": "http://localhost:8000/docs"
     }
 
+async def _save_upload(file: UploadFile, temp_dir: str) -> dict:
+    """Stream one upload to a temp file, enforcing the size limit, and return its path info"""
+    # Unique temp name, so uploads sharing a filename don't overwrite each other
+    async with aiofiles.tempfile.NamedTemporaryFile("wb", dir=temp_dir, suffix=".pdf", delete=False) as out:
+        size = 0
+        # Stream in 1MB chunks so the whole upload is never held in memory
+        while chunk := await file.read(1 << 20):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise ValueError(f"❌ '{file.filename}' exceeds 25MB")
+            await out.write(chunk)
+    
+    if size == 0:
+        raise ValueError(f"❌ '{file.filename}' is empty")
+    
+    logger.info(f"📦 Saved: {file.filename} ({size} bytes)")
+    return {
+        "path": out.name,
+        "filename": file.filename
+    }
+
 @app.post("/process-claim", response_model=ClaimProcessingResponse)
 async def process_claim(
     files: List[UploadFile] = File(..., description="Multiple PDF files (bill, ID card, discharge summary)")
@@ -111,18 +144,8 @@ async def process_claim(
         
         # Create temporary directory for file processing
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Save uploaded files temporarily
-            file_paths = []
-            for file in files:
-                file_path = Path(temp_dir) / file.filename
-                content = await file.read()
-                with open(file_path, "wb") as f:
-                    f.write(content)
-                file_paths.append({
-                    "path": str(file_path),
-                    "filename": file.filename
-                })
-                logger.info(f"📦 Saved: {file.filename} ({len(content)} bytes)")
+            # Save uploaded files temporarily (concurrently)
+            file_paths = await asyncio.gather(*[_save_upload(f, temp_dir) for f in files])
             
             # Process claim through orchestrator
             logger.info("🤖 Starting orchestrator processing...")
@@ -141,6 +164,79 @@ async def process_claim(
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.post("/batch-claims", response_model=BatchJobResponse)
+async def submit_batch_claims(
+    files: List[UploadFile] = File(..., description="PDF files for one or more claims"),
+    claim_ids: Optional[List[str]] = Form(None, description="Claim ID for each file, in upload order")
+):
+    """
+    Submit claims to the Gemini Batch API for non-interactive processing.
+    
+    Batch jobs are billed at a discount and complete asynchronously (up to 24h),
+    so use this for bulk audits and backfills; /process-claim remains the
+    low-latency path. Without claim_ids all files form a single claim.
+    
+    Returns:
+        BatchJobResponse with the job ID to poll via GET /batch-claims/{job_id}
+    """
+    if not orchestrator:
+        raise HTTPException(
+            status_code=503,
+            detail="Orchestrator not initialized. Check API keys and configuration."
+        )
+    
+    try:
+        await validate_pdf_files(files)
+        if claim_ids is None:
+            claim_ids = [uuid.uuid4().hex] * len(files)
+        if len(claim_ids) != len(files):
+            raise ValueError(f"❌ Got {len(claim_ids)} claim IDs for {len(files)} files")
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = await asyncio.gather(*[_save_upload(f, temp_dir) for f in files])
+            for file_info, claim_id in zip(file_paths, claim_ids):
+                file_info["claim_id"] = claim_id
+            job_id = await orchestrator.submit_batch(file_paths)
+        
+        logger.info(f"📬 Submitted batch job {job_id} for {len(set(claim_ids))} claims")
+        return BatchJobResponse(job_id=job_id, status="JOB_STATE_PENDING")
+    
+    except ValueError as ve:
+        logger.error(f"❌ Validation error: {str(ve)}")
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        logger.error(f"❌ Error submitting batch: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.get("/batch-claims/{job_id:path}", response_model=BatchJobResponse)
+async def get_batch_claims(job_id: str):
+    """
+    Poll a batch job submitted via POST /batch-claims.
+    
+    Returns the job status, plus a ClaimProcessingResponse per claim ID once
+    the job has finished. Results are deleted once collected, so a finished
+    job can be collected once; later polls return 410.
+    """
+    if not orchestrator:
+        raise HTTPException(
+            status_code=503,
+            detail="Orchestrator not initialized. Check API keys and configuration."
+        )
+    
+    try:
+        return await orchestrator.collect_batch(job_id)
+    except LookupError as le:
+        raise HTTPException(status_code=410, detail=str(le))
+    except Exception as e:
+        logger.error(f"❌ Error fetching batch {job_id}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Global exception handler"""
@@ -155,4 +251,5 @@ if __name__ == "__main__":
     logger.info("🚀 Starting Superclaims Backend Server...")
     logger.info("📖 API Docs: http://localhost:8000/docs")
     logger.info("🏥 Process Claims: POST http://localhost:8000/process-claim")
+    logger.info("📬 Batch Claims: POST http://localhost:8000/batch-claims")
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -2,7 +2,7 @@
 models/schemas.py - Pydantic models for data validation and API responses
 """
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Annotated, Dict, List, Optional, Literal, Union
 
 class BillDocument(BaseModel):
     """Medical bill document structure"""
@@ -31,6 +31,17 @@ class IDCardDocument(BaseModel):
     member_id: str = Field(..., description="Member ID")
     insurance_provider: Optional[str] = None
 
+AnyClaimDocument = Union[BillDocument, DischargeSummaryDocument, IDCardDocument]
+
+# Discriminated on "type" so pydantic validates against the matching model only
+ClaimDocument = Annotated[AnyClaimDocument, Field(discriminator="type")]
+
+class BatchExtractionResult(BaseModel):
+    """Structured output of a single batched extraction call"""
+    # Plain union: its schema is sent to Gemini, which rejects the oneOf/discriminator
+    # keys a discriminated union emits
+    documents: List[AnyClaimDocument]
+
 class ValidationResult(BaseModel):
     """Data validation results"""
     missing_documents: List[str] = Field(default_factory=list)
@@ -44,7 +55,13 @@ class ClaimDecision(BaseModel):
 
 class ClaimProcessingResponse(BaseModel):
     """Complete API response"""
-    documents: List[BillDocument | DischargeSummaryDocument | IDCardDocument]
+    documents: List[ClaimDocument]
     validation: ValidationResult
     claim_decision: ClaimDecision
-    processing_metadata: Optional[dict] = None
\ No newline at end of file
+    processing_metadata: Optional[dict] = None
+
+class BatchJobResponse(BaseModel):
+    """Batch claim job status, with per-claim results once the job has finished"""
+    job_id: str = Field(..., description="Batch job ID to poll")
+    status: str = Field(..., description="Batch API job state")
+    claims: Optional[Dict[str, ClaimProcessingResponse]] = None
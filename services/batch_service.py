@@ -0,0 +1,186 @@
+"""
+services/batch_service.py - Gemini Batch API for non-interactive claim workloads
+"""
+import asyncio
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+from google.genai import errors
+
+from models.schemas import BillDocument, DischargeSummaryDocument, IDCardDocument
+from services.llm_service import get_llm_service
+from utils.helpers import setup_logging
+
+logger = setup_logging()
+
+_SCHEMAS = {
+    "bill": BillDocument.model_json_schema(),
+    "discharge_summary": DischargeSummaryDocument.model_json_schema(),
+    "id_card": IDCardDocument.model_json_schema(),
+}
+
+_SYSTEM_PROMPT = """You are an expert at extracting information from medical insurance claim documents
+(medical bills, hospital discharge summaries, insurance ID cards).
+Read the attached PDF and return ONLY valid JSON (no markdown) matching the response schema.
+Use YYYY-MM-DD for dates and null for fields that are not present."""
+
+# Terminal states reported by the Batch API
+_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+class BatchService:
+    """Submit claim documents to the Gemini Batch API and collect the results"""
+
+    def __init__(self):
+        self.llm_service = get_llm_service()
+        self.client = self.llm_service.client
+        # Batch pricing applies to GA models only, so this can differ from the interactive model
+        self.model = os.getenv("GEMINI_BATCH_MODEL", "gemini-2.0-flash")
+        # doc_type -> Gemini Schema dict, converted on first batch use
+        self._schemas: Dict[str, Dict] = {}
+
+    async def submit(self, documents: List[Dict]) -> str:
+        """
+        Upload PDFs and submit one extraction request per document as a batch job
+
+        Args:
+            documents: List of dicts with 'claim_id', 'doc_type', 'path' and 'filename' keys
+
+        Returns:
+            Batch job name, used as the job ID for polling
+        """
+        # Uploads share the LLM service's in-flight limit and retry policy
+        uploads = await asyncio.gather(*[
+            self.llm_service.upload_file(file=doc["path"], config={"mime_type": "application/pdf"})
+            for doc in documents
+        ], return_exceptions=True)
+        uploaded_names = [u.name for u in uploads if not isinstance(u, BaseException)]
+        try:
+            for uploaded in uploads:
+                if isinstance(uploaded, BaseException):
+                    raise uploaded
+            lines = [self._build_request(doc, uploaded) for doc, uploaded in zip(documents, uploads)]
+
+            with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+                f.write("\n".join(json.dumps(line) for line in lines))
+                jsonl_path = f.name
+            try:
+                requests_file = await self.llm_service.upload_file(
+                    file=jsonl_path,
+                    config={"display_name": "superclaims-batch", "mime_type": "jsonl"}
+                )
+            finally:
+                os.remove(jsonl_path)
+            uploaded_names.append(requests_file.name)
+
+            job = await self.client.aio.batches.create(
+                model=self.model,
+                src=requests_file.name,
+                config={"display_name": "superclaims-batch"}
+            )
+        except Exception:
+            # The PDFs hold patient data - don't leave them behind for a job that never ran
+            await self._delete_files(uploaded_names)
+            raise
+        logger.info("✅ BatchService: Submitted %d documents as %s", len(lines), job.name)
+        return job.name
+
+    async def get_results(self, job_name: str) -> Tuple[str, Optional[List[Tuple[Dict, Optional[Dict]]]]]:
+        """
+        Poll a batch job
+
+        Once the job has finished, its uploaded PDFs, requests file and results file are
+        deleted from the Files API, so results can be collected once per job
+
+        Returns:
+            (state, results) - results is None until the job has finished, then a list of
+            (document info, extracted fields or None if that request failed)
+
+        Raises:
+            LookupError: If the job's results were already collected
+        """
+        job = await self.client.aio.batches.get(name=job_name)
+        state = job.state.name
+        if state not in _DONE_STATES:
+            return state, None
+
+        results = []
+        if state == "JOB_STATE_SUCCEEDED":
+            for line in await self._download_lines(job_name, job.dest.file_name):
+                results.append(self._parse_result(line))
+            infos = [info for info, _ in results]
+        else:
+            logger.warning("⚠️ BatchService: %s finished as %s", job_name, state)
+            # No results to read the uploaded PDF names from, so take them from the request keys
+            infos = [json.loads(line["key"]) for line in await self._download_lines(job_name, job.src.file_name)]
+
+        await self._delete_files(
+            [info["file"] for info in infos if "file" in info]
+            + [name for name in (job.src.file_name, job.dest and job.dest.file_name) if name]
+        )
+        return state, results
+
+    async def _download_lines(self, job_name: str, file_name: str) -> List[Dict]:
+        """Download a JSONL file of a finished job and parse its lines"""
+        try:
+            content = await self.client.aio.files.download(file=file_name)
+        except errors.ClientError as e:
+            if e.code in (403, 404):
+                raise LookupError(f"❌ Results of batch job {job_name} were already collected")
+            raise
+        return [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+
+    async def _delete_files(self, names: List[str]) -> None:
+        """Remove Files API files of a submitted or finished job"""
+        await asyncio.gather(*(self.llm_service.delete_file(name) for name in names))
+
+    def _build_request(self, doc: Dict, uploaded) -> Dict:
+        """Build one JSONL batch line extracting a typed document straight from its uploaded PDF"""
+        # The key round-trips the document info and uploaded file name, so no job state is kept
+        key = json.dumps({
+            "claim_id": doc["claim_id"],
+            "doc_type": doc["doc_type"],
+            "filename": doc["filename"],
+            "file": uploaded.name
+        })
+        return {
+            "key": key,
+            "request": {
+                "contents": [{
+                    "role": "user",
+                    "parts": [
+                        {"file_data": {"file_uri": uploaded.uri, "mime_type": "application/pdf"}},
+                        {"text": f"Extract the {doc['doc_type']} fields from this document."}
+                    ]
+                }],
+                "system_instruction": {"parts": [{"text": _SYSTEM_PROMPT}]},
+                "generation_config": {
+                    "temperature": 0.0,
+                    "response_mime_type": "application/json",
+                    "response_schema": self._response_schema(doc["doc_type"])
+                }
+            }
+        }
+
+    def _response_schema(self, doc_type: str) -> Dict:
+        """Gemini Schema form of a document type's JSON Schema (const, anyOf null, ...)"""
+        if doc_type not in self._schemas:
+            # JSONL lines bypass the SDK, so convert as generate_content would. This relies on
+            # the SDK's private transformer, so it runs lazily: an SDK change can break batch
+            # submission but never the interactive path, which constructs this service too
+            from google.genai import _transformers
+            self._schemas[doc_type] = _transformers.t_schema(self.client, _SCHEMAS[doc_type]).model_dump(
+                mode="json", by_alias=True, exclude_none=True
+            )
+        return self._schemas[doc_type]
+
+    def _parse_result(self, line: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """Split one batch output line into document info and extracted fields"""
+        info = json.loads(line["key"])
+        try:
+            text = line["response"]["candidates"][0]["content"]["parts"][0]["text"]
+            return info, json.loads(text)
+        except (KeyError, IndexError, json.JSONDecodeError) as e:
+            logger.error("❌ BatchService: No result for %s: %s", info["filename"], line.get("error", e))
+            return info, None
@@ -1,17 +1,51 @@
 """
 services/llm_service.py - LLM interaction service (Gemini, OpenAI, Anthropic)
 """
+import asyncio
+import hashlib
+import logging
 import os
 import json
+from typing import Callable, Optional
+import httpx
+from cachetools import TTLCache
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 from utils.helpers import setup_logging
 
 logger = setup_logging()
 
+# Connection pool shared by every agent's Gemini calls (keep-alive + HTTP/2)
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+def _is_retryable(exc: BaseException) -> bool:
+    """True for Gemini rate-limit (429) and transient server (5xx) errors"""
+    from google.genai import errors
+    return isinstance(exc, errors.APIError) and (exc.code == 429 or exc.code >= 500)
+
+# Exponential backoff with jitter for rate-limited / transient Gemini calls
+gemini_retry = retry(
+    retry=retry_if_exception(_is_retryable),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    stop=stop_after_attempt(5),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True
+)
+
 class LLMService:
     """Interact with multiple LLM providers"""
     
     def __init__(self, provider: str = "gemini"):
         self.provider = provider
+        # Caps concurrent outbound requests across all agents sharing this service
+        self._sem = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_INFLIGHT", "8")))
+        # sha256(system_prompt + prompt) -> parsed structured output, for re-submitted documents
+        self._response_cache = TTLCache(maxsize=10_000, ttl=86400)
         
         if provider == "gemini":
             api_key = os.getenv("GEMINI_API_KEY")
@@ -19,48 +53,113 @@ class LLMService:
                 raise ValueError("❌ GEMINI_API_KEY not set")
             try:
                 import google.genai as genai
-                self.client = genai.Client(api_key=api_key)
+                self.client = genai.Client(
+                    api_key=api_key,
+                    http_options=genai.types.HttpOptions(
+                        client_args={"limits": HTTP_LIMITS, "http2": True},
+                        async_client_args={"limits": HTTP_LIMITS, "http2": True}
+                    )
+                )
                 self.model = "gemini-2.0-flash-exp"
                 logger.info("✅ LLMService: Gemini initialized")
             except ImportError:
                 raise ImportError("❌ google-genai not installed")
     
+    @gemini_retry
+    async def generate(self, model: str, contents, config):
+        """
+        Call Gemini generate_content within the process-wide in-flight limit
+        (GEMINI_MAX_INFLIGHT); retried on 429/5xx by gemini_retry
+        """
+        async with self._sem:
+            return await self.client.aio.models.generate_content(model=model, contents=contents, config=config)
+    
+    @gemini_retry
+    async def upload_file(self, **kwargs):
+        """Upload to the Files API within the in-flight limit; retried on 429/5xx"""
+        async with self._sem:
+            file = kwargs.get("file")
+            if hasattr(file, "seek"):
+                # A retried upload from a stream must start over
+                file.seek(0)
+            return await self.client.aio.files.upload(**kwargs)
+    
+    async def delete_file(self, name: str) -> None:
+        """Delete a Files API file within the in-flight limit; failures are only logged"""
+        try:
+            async with self._sem:
+                await self.client.aio.files.delete(name=name)
+        except Exception as e:
+            # Files expire on their own after 48h
+            logger.warning("⚠️ Could not delete file %s: %s", name, e)
+    
     async def get_completion(self, prompt: str, system_prompt: str = None) -> str:
         """Get text completion from LLM"""
         try:
             if self.provider == "gemini":
                 import google.genai as genai
-                full_prompt = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
-                response = self.client.models.generate_content(
+                response = await self.generate(
                     model=self.model,
-                    contents=full_prompt,
-                    config=genai.types.GenerateContentConfig(temperature=0.3)
+                    contents=prompt,
+                    # Static system prompt as system_instruction, so requests share a cacheable prefix
+                    config=genai.types.GenerateContentConfig(system_instruction=system_prompt, temperature=0.3)
                 )
                 return response.text
         except Exception as e:
-            logger.error(f"❌ LLM error: {str(e)}")
+            logger.error("❌ LLM error: %s", e)
             raise
     
-    async def get_structured_output(self, prompt: str, system_prompt: str, schema: dict) -> dict:
-        """Get structured JSON output from LLM"""
+    async def get_structured_output(
+        self,
+        prompt: str,
+        system_prompt: str,
+        schema: dict,
+        validate: Optional[Callable[[dict], object]] = None
+    ) -> dict:
+        """
+        Get structured JSON output from LLM, reusing results for identical requests
+        
+        Args:
+            validate: Called on a fresh response before it is cached; raising keeps a
+                response the caller rejects out of the cache
+        """
+        key = hashlib.sha256(
+            f"{json.dumps(schema, sort_keys=True)}\0{system_prompt}\0{prompt}".encode()
+        ).hexdigest()
+        if key in self._response_cache:
+            logger.info("✅ LLMService: Structured output served from cache")
+            return self._response_cache[key]
+        
         try:
             if self.provider == "gemini":
                 import google.genai as genai
-                full_prompt = f"{system_prompt}\n\n{prompt}\n\nIMPORTANT: Return ONLY valid JSON. No markdown."
-                response = self.client.models.generate_content(
+                response = await self.generate(
                     model=self.model,
-                    contents=full_prompt,
+                    contents=prompt,
                     config=genai.types.GenerateContentConfig(
+                        system_instruction=system_prompt,
                         temperature=0.0,
                         response_mime_type="application/json",
                         response_schema=schema
                     )
                 )
                 result = json.loads(response.text)
+                if validate:
+                    validate(result)
+                self._response_cache[key] = result
                 return result
         except json.JSONDecodeError as e:
-            logger.error(f"❌ JSON error: {str(e)}")
+            logger.error("❌ JSON error: %s", e)
             raise ValueError(f"Invalid JSON from LLM: {str(e)}")
         except Exception as e:
-            logger.error(f"❌ Structured output error: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error("❌ Structured output error: %s", e)
+            raise
+
+
+_default_llm_service: LLMService | None = None
+
+def get_llm_service() -> LLMService:
+    """Return the process-wide LLMService, creating it on first use"""
+    global _default_llm_service
+    _default_llm_service = _default_llm_service or LLMService()
+    return _default_llm_service
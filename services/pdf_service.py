@@ -1,68 +1,285 @@
 """
-services/pdf_service.py - PDF text extraction using Google Gemini API
+services/pdf_service.py - PDF text extraction (local pdfium, falling back to Google Gemini API)
 """
+import asyncio
+import hashlib
+import io
+import mmap
+import multiprocessing
 import os
+import time
+import uuid
 import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+import aiofiles
+import pypdfium2 as pdfium
+from google.genai.types import GenerateContentConfig, Part
+from services.llm_service import get_llm_service
 from utils.helpers import setup_logging
 
 logger = setup_logging()
 
+# Inline requests are capped at 20MB after base64 encoding; larger PDFs go through the Files API
+INLINE_PDF_MAX_BYTES = 15 * 1024 * 1024
+
+# Local extraction yielding fewer non-whitespace chars is treated as a scanned PDF and sent to Gemini
+LOCAL_TEXT_MIN_CHARS = 200
+
+# Longer PDFs are sent to Gemini as page ranges of this size, extracted in parallel
+PAGES_PER_CHUNK = 10
+
+EXTRACT_PROMPT = "Extract ALL text content from this document. Include names, dates, amounts, diagnoses, etc."
+
+def _pdfium_extract(pdf_path: str) -> Tuple[str, int]:
+    """
+    Extract the embedded text layer of a PDF locally (module-level so worker processes can run it)
+    
+    Returns:
+        (text, page count) - text is empty when the layer is missing or too thin to use
+    """
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        pages = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            pages.append(textpage.get_text_bounded())
+            textpage.close()
+            page.close()
+        text = "\n\n".join(pages).strip()
+        if len("".join(text.split())) < LOCAL_TEXT_MIN_CHARS:
+            text = ""
+        return text, len(pages)
+    finally:
+        pdf.close()
+
+def _pdfium_split(pdf_path: str, pages_per_chunk: int) -> List[bytes]:
+    """Split a PDF into standalone sub-PDFs of consecutive pages (module-level for worker processes)"""
+    src = pdfium.PdfDocument(pdf_path)
+    try:
+        chunks = []
+        for start in range(0, len(src), pages_per_chunk):
+            dst = pdfium.PdfDocument.new()
+            try:
+                dst.import_pages(src, list(range(start, min(start + pages_per_chunk, len(src)))))
+                buf = io.BytesIO()
+                dst.save(buf)
+            finally:
+                dst.close()
+            chunks.append(buf.getvalue())
+        return chunks
+    finally:
+        src.close()
+
 class PDFService:
     """Extract text from PDF files using Gemini"""
     
     def __init__(self):
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("❌ GEMINI_API_KEY environment variable not set")
+        # Gemini calls go through the shared LLM service: its keep-alive HTTP/2 connection pool,
+        # in-flight limit and retry policy cover extraction traffic too
+        self.llm_service = get_llm_service()
+        # Built once and shared by every extraction call
+        self._config = GenerateContentConfig(temperature=0.0)
+        # CPU-bound pdfium work (text layers, page splits) runs here, in parallel across cores.
+        # Workers must not be forked from this process once aiofiles/httpx threads are running
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context(start_method)
+        )
+        logger.info("✅ PDFService: Gemini API initialized")
         
-        try:
-            import google.genai as genai
-            self.client = genai.Client(api_key=api_key)
-            logger.info("✅ PDFService: Gemini API initialized")
-        except ImportError:
-            raise ImportError("❌ google-genai not installed: pip install google-genai")
+        # Extracted text keyed by PDF content hash, so re-uploaded files skip Gemini.
+        # Opt-in: the text holds patient data, so it is only kept on disk when a directory is set
+        cache_dir = os.getenv("PDF_TEXT_CACHE_DIR")
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_ttl = int(os.getenv("PDF_TEXT_CACHE_TTL_SECONDS", "86400"))
+        self.cache_max_bytes = int(os.getenv("PDF_TEXT_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
     
     async def extract_text(self, pdf_path: str) -> str:
-        """Extract text from PDF using Gemini"""
+        """Extract text from PDF, locally when it has a text layer, otherwise using Gemini"""
         try:
-            import google.genai as genai
-            
-            filepath = pathlib.Path(pdf_path)
-            
-            if not filepath.exists():
+            # One stat covers existence and size; the suffix is a plain string check
+            try:
+                st = os.stat(pdf_path)
+            except FileNotFoundError:
                 raise FileNotFoundError(f"❌ PDF not found: {pdf_path}")
             
-            if filepath.suffix.lower() != '.pdf':
+            if pdf_path[-4:].lower() != '.pdf':
                 raise ValueError(f"❌ Not a PDF file: {pdf_path}")
             
-            # Read PDF
-            pdf_data = filepath.read_bytes()
-            logger.info(f"📄 Extracting text from {filepath.name} ({len(pdf_data)} bytes)...")
+            if st.st_size == 0:
+                raise ValueError(f"❌ PDF is empty: {pdf_path}")
             
-            # Use Gemini
-            prompt = "Extract ALL text content from this document. Include names, dates, amounts, diagnoses, etc."
+            # Map the PDF read-only: hashing and size checks use the page cache directly,
+            # and bytes are only materialized (once) when the PDF is sent inline
+            with open(pdf_path, 'rb') as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return await self._extract_mapped(pdf_path, mm)
+            finally:
+                mm.close()
             
-            response = self.client.models.generate_content(
+        except Exception as e:
+            logger.error("❌ PDF extraction error: %s", e)
+            raise
+    
+    async def _extract_mapped(self, pdf_path: str, mm: mmap.mmap) -> str:
+        """Extract text from a memory-mapped PDF, serving repeats from the text cache"""
+        name = os.path.basename(pdf_path)
+        cache_path = None
+        if self.cache_dir:
+            # Serve re-uploaded PDFs from the content-addressed text cache
+            digest = await asyncio.to_thread(lambda: hashlib.sha256(mm).hexdigest())
+            cache_path = self.cache_dir / f"{digest}.txt"
+            cached_text = await self._read_cache(cache_path)
+            if cached_text is not None:
+                logger.info("✅ Using cached text for %s (%d chars)", name, len(cached_text))
+                return cached_text
+        
+        logger.info("📄 Extracting text from %s (%d bytes)...", name, len(mm))
+        
+        # Text-native PDFs are read locally, skipping the Gemini round-trip entirely
+        local_text, page_count = await self._extract_local(pdf_path)
+        if local_text:
+            await self._write_cache(cache_path, local_text)
+            logger.info("✅ Extracted %d chars locally from %s", len(local_text), name)
+            return local_text
+        
+        if page_count > PAGES_PER_CHUNK:
+            # Long PDFs go out as page ranges: lower latency per call, and a failure retries one range
+            extracted_text = await self.extract_text_paged(pdf_path, PAGES_PER_CHUNK)
+        else:
+            extracted_text = await self._gemini_extract(mm, pdf_path)
+        
+        if not extracted_text or len(extracted_text.strip()) == 0:
+            logger.warning("⚠️ No text extracted from %s", name)
+            extracted_text = "[PDF content could not be extracted]"
+        else:
+            await self._write_cache(cache_path, extracted_text)
+        
+        logger.info("✅ Extracted %d chars from %s", len(extracted_text), name)
+        return extracted_text
+    
+    async def extract_text_paged(self, pdf_path: str, pages_per_chunk: int = PAGES_PER_CHUNK) -> str:
+        """
+        Extract text from a long PDF by sending page ranges to Gemini concurrently
+        
+        Args:
+            pdf_path: Path to the PDF
+            pages_per_chunk: Number of pages per Gemini call
+        
+        Returns:
+            Raw extracted text of every page range, joined in page order
+        """
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(self._pool, _pdfium_split, pdf_path, pages_per_chunk)
+        logger.info("📑 Extracting %s as %d page ranges", os.path.basename(pdf_path), len(chunks))
+        # Each call counts against LLMService's process-wide in-flight limit, so the fan-out stays bounded
+        texts = await asyncio.gather(*(self._gemini_extract(chunk, io.BytesIO(chunk)) for chunk in chunks))
+        return "\n\n".join(text for text in texts if text.strip())
+    
+    async def _gemini_extract(self, data, upload_source) -> str:
+        """Extract text from one PDF (or page range) with a single Gemini call"""
+        uploaded = None
+        if len(data) > INLINE_PDF_MAX_BYTES:
+            # Too large to send inline - upload through the Files API and reference it by URI
+            uploaded = await self.llm_service.upload_file(
+                file=upload_source,
+                config={"mime_type": "application/pdf"}
+            )
+            pdf_part = uploaded
+        else:
+            pdf_part = Part.from_bytes(
+                data=data[:],
+                mime_type='application/pdf',
+            )
+        
+        try:
+            # Shares LLMService's in-flight limit and retry policy with every other Gemini call
+            response = await self.llm_service.generate(
                 model="gemini-2.0-flash-exp",
-                contents=[
-                    genai.types.Part.from_bytes(
-                        data=pdf_data,
-                        mime_type='application/pdf',
-                    ),
-                    prompt
-                ],
-                config=genai.types.GenerateContentConfig(temperature=0.0)
+                contents=[pdf_part, EXTRACT_PROMPT],
+                config=self._config
             )
-            
-            extracted_text = response.text
-            
-            if not extracted_text or len(extracted_text.strip()) == 0:
-                logger.warning(f"⚠️ No text extracted from {filepath.name}")
-                extracted_text = "[PDF content could not be extracted]"
-            
-            logger.info(f"✅ Extracted {len(extracted_text)} chars from {filepath.name}")
-            return extracted_text
-            
+        finally:
+            if uploaded:
+                await self.llm_service.delete_file(uploaded.name)
+        
+        return response.text or ""
+    
+    async def _extract_local(self, pdf_path: str) -> Tuple[str, int]:
+        """Read the PDF's text layer and page count with pdfium in the process pool; ("", 0) on failure"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._pool, _pdfium_extract, pdf_path)
         except Exception as e:
-            logger.error(f"❌ PDF extraction error: {str(e)}")
-            raise
\ No newline at end of file
+            logger.warning("⚠️ Local text extraction failed for %s: %s", pdf_path, e)
+            return "", 0
+    
+    async def _read_cache(self, cache_path: pathlib.Path):
+        """Return cached text, or None when missing or older than the cache TTL (which removes it)"""
+        try:
+            if time.time() - cache_path.stat().st_mtime > self.cache_ttl:
+                cache_path.unlink(missing_ok=True)
+                return None
+            async with aiofiles.open(cache_path, 'r', encoding='utf-8') as f:
+                return await f.read()
+        except OSError:
+            return None
+    
+    async def _write_cache(self, cache_path, text: str) -> None:
+        """Atomically store extracted text; a failed write only costs a future cache miss"""
+        if cache_path is None:
+            return
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+                await f.write(text)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("⚠️ Could not cache extracted text: %s", e)
+            tmp_path.unlink(missing_ok=True)
+            return
+        await asyncio.to_thread(self._evict_cache)
+    
+    def _evict_cache(self) -> None:
+        """Drop expired entries, then the oldest ones until the cache fits PDF_TEXT_CACHE_MAX_BYTES"""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".txt"):
+                continue
+            try:
+                st = entry.stat()
+                if now - st.st_mtime > self.cache_ttl:
+                    os.remove(entry.path)
+                else:
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            except FileNotFoundError:
+                continue
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.cache_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+    
+    def close(self) -> None:
+        """Shut down the worker processes"""
+        self._pool.shutdown(cancel_futures=True)
+    
+    async def extract_text_batch(self, paths: List[str]) -> List:
+        """
+        Extract text from several PDFs concurrently (bounded by GEMINI_MAX_INFLIGHT)
+        
+        Returns:
+            Extracted text per path, in order; a failed path holds its exception instead
+        """
+        return await asyncio.gather(*(self.extract_text(p) for p in paths), return_exceptions=True)
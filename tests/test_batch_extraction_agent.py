@@ -0,0 +1,14 @@
+"""
+tests/test_batch_extraction_agent.py - Batched extraction schema compatibility
+"""
+from google.genai import Client, _transformers
+
+from agents.batch_extraction_agent import _BATCH_SCHEMA
+
+
+def test_batch_schema_accepted_by_gemini_sdk():
+    """The batch response schema must survive the SDK's Schema conversion"""
+    schema = _transformers.t_schema(Client(api_key="test"), _BATCH_SCHEMA)
+    
+    variants = schema.properties["documents"].items.any_of
+    assert {v.properties["type"].enum[0] for v in variants} == {"bill", "discharge_summary", "id_card"}
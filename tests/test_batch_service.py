@@ -0,0 +1,61 @@
+"""
+tests/test_batch_service.py - Batch API request construction
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+from google.genai import types
+
+from services.batch_service import BatchService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    return BatchService()
+
+
+def test_batch_request_schema_is_gemini_schema(service):
+    """JSONL lines carry a Gemini Schema, not raw pydantic JSON Schema"""
+    doc = {"claim_id": "c1", "doc_type": "bill", "filename": "bill.pdf"}
+    
+    uploaded = SimpleNamespace(name="files/abc", uri="https://example.com/files/abc")
+    request = service._build_request(doc, uploaded)
+    schema = request["request"]["generation_config"]["response_schema"]
+    
+    assert "const" not in json.dumps(schema)
+    assert types.Schema.model_validate(schema).properties["total_amount"].type == types.Type.NUMBER
+    assert json.loads(request["key"]) == {**doc, "file": "files/abc"}
+
+
+@pytest.mark.asyncio
+async def test_finished_job_deletes_its_files(service, monkeypatch):
+    """Collecting a finished job removes the uploaded PDF, requests file and results file"""
+    job = SimpleNamespace(
+        state=SimpleNamespace(name="JOB_STATE_SUCCEEDED"),
+        src=SimpleNamespace(file_name="files/requests"),
+        dest=SimpleNamespace(file_name="files/results")
+    )
+    key = json.dumps({"claim_id": "c1", "doc_type": "bill", "filename": "bill.pdf", "file": "files/pdf"})
+    line = {"key": key, "response": {"candidates": [{"content": {"parts": [{"text": '{"hospital_name": "A"}'}]}}]}}
+    deleted = []
+    
+    async def get(name):
+        return job
+    
+    async def download(file):
+        return json.dumps(line).encode()
+    
+    async def delete_file(name):
+        deleted.append(name)
+    
+    monkeypatch.setattr(service.client.aio.batches, "get", get)
+    monkeypatch.setattr(service.client.aio.files, "download", download)
+    monkeypatch.setattr(service.llm_service, "delete_file", delete_file)
+    
+    state, results = await service.get_results("batches/1")
+    
+    assert state == "JOB_STATE_SUCCEEDED"
+    assert results[0][1] == {"hospital_name": "A"}
+    assert sorted(deleted) == ["files/pdf", "files/requests", "files/results"]
@@ -0,0 +1,22 @@
+"""
+tests/test_classifier_agent.py - Filename-based classification
+"""
+import pytest
+
+from agents.classifier_agent import ClassifierAgent
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    return ClassifierAgent()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("filename, expected", [
+    ("MediDischarge.pdf", "discharge_summary"),  # "id" overlaps "discharge"
+    ("hospital_bill_summary.pdf", "bill"),
+    ("insurance_card.pdf", "id_card"),
+])
+async def test_filename_keywords(agent, filename, expected):
+    assert await agent._classify_uncached(filename) == expected
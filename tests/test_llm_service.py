@@ -0,0 +1,60 @@
+"""
+tests/test_llm_service.py - LLMService concurrency
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.llm_service import LLMService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    return LLMService()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_overlap(service, monkeypatch):
+    """Three concurrent calls finish in about the slowest call's time, not the sum"""
+    delays = {"a": 0.2, "b": 0.3, "c": 0.4}
+    
+    async def fake_generate_content(model, contents, config):
+        await asyncio.sleep(delays[contents])
+        return SimpleNamespace(text=contents)
+    
+    monkeypatch.setattr(service.client.aio.models, "generate_content", fake_generate_content)
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(*(service.get_completion(p) for p in delays))
+    elapsed = time.perf_counter() - start
+    
+    assert results == ["a", "b", "c"]
+    assert elapsed < 0.6  # serial would take 0.9s
+
+
+@pytest.mark.asyncio
+async def test_structured_output_cache_respects_schema_and_validation(service, monkeypatch):
+    """Responses are cached per schema, and only once the caller's validation passes"""
+    calls = []
+    
+    async def fake_generate_content(model, contents, config):
+        calls.append(config.response_schema)
+        return SimpleNamespace(text='{"documents": []}')
+    
+    def reject(result):
+        raise ValueError("wrong document count")
+    
+    monkeypatch.setattr(service.client.aio.models, "generate_content", fake_generate_content)
+    schema_a = {"type": "object", "title": "A"}
+    schema_b = {"type": "object", "title": "B"}
+    
+    with pytest.raises(ValueError):
+        await service.get_structured_output("doc", "sys", schema_a, validate=reject)
+    await service.get_structured_output("doc", "sys", schema_a)
+    await service.get_structured_output("doc", "sys", schema_a)
+    await service.get_structured_output("doc", "sys", schema_b)
+    
+    assert calls == [schema_a, schema_a, schema_b]
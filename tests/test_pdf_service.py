@@ -0,0 +1,68 @@
+"""
+tests/test_pdf_service.py - Local extraction and extracted text cache retention
+"""
+import os
+import time
+import warnings
+
+import pypdfium2 as pdfium
+import pytest
+
+from services.pdf_service import PDFService, _pdfium_extract
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.delenv("PDF_TEXT_CACHE_DIR", raising=False)
+    service = PDFService()
+    yield service
+    service.close()
+
+
+def test_text_cache_disabled_by_default(service):
+    assert service.cache_dir is None
+
+
+def test_text_cache_evicts_expired_and_oversize_entries(monkeypatch, tmp_path):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    monkeypatch.setenv("PDF_TEXT_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("PDF_TEXT_CACHE_TTL_SECONDS", "60")
+    monkeypatch.setenv("PDF_TEXT_CACHE_MAX_BYTES", "10")
+    service = PDFService()
+    try:
+        now = time.time()
+        for name, age in [("expired", 120), ("old", 30), ("new", 10)]:
+            path = tmp_path / f"{name}.txt"
+            path.write_text("x" * 6)
+            os.utime(path, (now - age, now - age))
+        
+        service._evict_cache()
+        
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["new.txt"]
+    finally:
+        service.close()
+
+
+@pytest.fixture
+def blank_pdf(tmp_path):
+    path = tmp_path / "scan.pdf"
+    pdf = pdfium.PdfDocument.new()
+    pdf.new_page(200, 200)
+    pdf.save(str(path))
+    pdf.close()
+    return path
+
+
+def test_pdfium_extract_blank_pdf_without_warnings(blank_pdf):
+    """A PDF without a text layer yields no text (so Gemini is used) and its page count"""
+    path = blank_pdf
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert _pdfium_extract(str(path)) == ("", 1)
+
+
+@pytest.mark.asyncio
+async def test_local_extraction_runs_in_worker_pool(service, blank_pdf):
+    """pdfium work runs in the (non-fork) worker pool"""
+    assert await service._extract_local(str(blank_pdf)) == ("", 1)
@@ -5,40 +5,56 @@ import logging
 from fastapi import UploadFile
 from typing import List
 
+_LOGGER = None
+
 def setup_logging():
-    """Configure logging for the application"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    return logging.getLogger("superclaims")
+    """Configure logging for the application (once) and return the app logger"""
+    global _LOGGER
+    if _LOGGER is None:
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        _LOGGER = logging.getLogger("superclaims")
+    return _LOGGER
+
+# Stripped text shorter than this (e.g. scanned PDFs without OCR) is not sent to the LLM
+MIN_EXTRACTABLE_TEXT_CHARS = 50
+
+def has_extractable_text(text: str) -> bool:
+    """Check whether extracted PDF text is long enough to send to the LLM"""
+    return bool(text) and len(text.strip()) >= MIN_EXTRACTABLE_TEXT_CHARS
+
+MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB
+
+def _validate_one(file: UploadFile) -> None:
+    """Validate a single uploaded file without reading its body"""
+    # Check filename (before anything dereferences it)
+    if not file.filename:
+        raise ValueError("❌ Invalid filename")
+    
+    # Check extension
+    if file.filename.rpartition('.')[2].lower() != 'pdf':
+        raise ValueError(f"❌ '{file.filename}' is not a PDF")
+    
+    # Check file size from the multipart headers; when unknown, the limit is
+    # enforced while the upload is streamed to disk instead
+    size = getattr(file, "size", None)
+    if size is None:
+        return
+    
+    if size > MAX_FILE_SIZE:
+        size_mb = size / (1024 * 1024)
+        raise ValueError(f"❌ '{file.filename}' exceeds 25MB ({size_mb:.2f}MB)")
+    
+    if size == 0:
+        raise ValueError(f"❌ '{file.filename}' is empty")
 
 async def validate_pdf_files(files: List[UploadFile]) -> bool:
     """Validate uploaded files"""
     if len(files) < 1:
         raise ValueError("❌ At least one PDF file required")
     
-    MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB
-    
-    for file in files:
-        # Check extension
-        if not file.filename.lower().endswith('.pdf'):
-            raise ValueError(f"❌ '{file.filename}' is not a PDF")
-        
-        # Check filename
-        if not file.filename:
-            raise ValueError("❌ Invalid filename")
-        
-        # Check file size
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            size_mb = len(content) / (1024 * 1024)
-            raise ValueError(f"❌ '{file.filename}' exceeds 25MB ({size_mb:.2f}MB)")
-        
-        if len(content) == 0:
-            raise ValueError(f"❌ '{file.filename}' is empty")
-        
-        # Reset pointer
-        await file.seek(0)
-    
-    return True
\ No newline at end of file
+    for f in files:
+        _validate_one(f)
+    return True
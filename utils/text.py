@@ -0,0 +1,31 @@
+"""
+utils/text.py - Text helpers for preparing document text for LLM prompts
+"""
+
+# Rough characters-per-token ratio for Gemini on English text
+CHARS_PER_TOKEN = 4
+
+def smart_truncate(text: str, head_chars: int = 1500, tail_chars: int = 1000, max_tokens: int = 1200) -> str:
+    """
+    Shorten long document text to its head and tail for an extraction prompt
+    
+    Bills and discharge summaries carry their key fields in the header and
+    the totals/sign-off, so the middle is dropped first.
+    
+    Args:
+        text: Extracted document text
+        head_chars: Characters kept from the start
+        tail_chars: Characters kept from the end
+        max_tokens: Approximate token budget for the returned text
+        
+    Returns:
+        The text unchanged if it fits, otherwise head + "\\n...\\n" + tail
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    if head_chars + tail_chars > budget:
+        head_chars = budget * head_chars // (head_chars + tail_chars)
+        tail_chars = budget - head_chars
+    
+    if len(text) <= head_chars + tail_chars:
+        return text
+    return text[:head_chars] + "\n...\n" + text[len(text) - tail_chars:]